@@ -6,8 +6,6 @@
 # This module is part of Creoleparser and is released under
 # the MIT License: http://www.opensource.org/licenses/mit-license.php
 #
-import string
-import keyword
 
 from .core import Parser, ArgParser
 from .dialects import (creole11_base, creole10_base, creepy10_base,
@@ -27,10 +25,3 @@ text2html = Parser(dialect=create_dialect(creole11_base), method='html')
 #                       illegal_keys=keyword.kwlist + ['macro_name',
 #                         'arg_string', 'body', 'isblock', 'environ', 'macro'])
 #"""Function for parsing macro arg_strings using a relaxed xml style"""
-
-def _test():
-    import doctest
-    doctest.testmod()
-
-if __name__ == "__main__":
-    _test()
@@ -17,7 +17,7 @@ __docformat__ = 'restructuredtext en'
 escape_char = '~'
 esc_neg_look = '(?<!' + re.escape(escape_char) + ')'
 esc_to_remove = re.compile(''.join([r'(?<!',re.escape(escape_char),')',re.escape(escape_char),r'(?!([ \n]|$))']))
-place_holder_re = re.compile(r'<<<(-?\d+?)>>>')
+place_holder_re = re.compile(r'<<<(-?[0-9]+)>>>')
 
 
 class Parser(object):
@@ -132,8 +132,9 @@ class Parser(object):
         :parameter text: text to be processsed.
 
         """
-        text = text.replace("\r\n", "\n")
-        text = text.replace("\r", "\n")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+            text = text.replace("\r", "\n")
 
         return text    
 
@@ -179,9 +180,8 @@ class ArgParser(object):
             keyword arguments. It must accept a single positional argument.
             For example, this can be used to make keywords case insensitive:
             
-            >>> from string import lower
             >>> from dialects import creepy20_base
-            >>> my_parser = ArgParser(dialect=creepy20_base(),key_func=lower)
+            >>> my_parser = ArgParser(dialect=creepy20_base(),key_func=str.lower)
             >>> my_parser(" Foo='one' ")
             ([], {'foo': 'one'})
             
@@ -216,34 +216,35 @@ class ArgParser(object):
         
         frags = fragmentize(arg_string,self.dialect.top_elements,{},{})
         positional_args = []
-        kw_args = {}
+        # collect every value first so repeated keys are merged only once
+        values = {}
         for arg in frags:
-           if isinstance(arg,tuple):
-             k, v  = arg
-             if convert_unicode_keys:
-                 k = str(k)
-             if key_func:
-                 k =  key_func(k)
-             if k in illegal_keys:
-                 k = k + '_'
-             if k in kw_args:
-                if isinstance(v,list):
-                   try:
-                      kw_args[k].extend(v)
-                   except AttributeError:
-                      v.insert(0,kw_args[k])
-                      kw_args[k] = v
-                elif isinstance(kw_args[k],list):
-                   kw_args[k].append(v)
-                else:
-                   kw_args[k] = [kw_args[k], v]
-                kw_args[k] = ImplicitList(kw_args[k])
-             else:
-                kw_args[k] = v
-             if isinstance(kw_args[k],ImplicitList) and convert_implicit_lists:
-                 kw_args[k] = ' ' .join(kw_args[k])
-           else:
-             positional_args.append(arg)
+            if isinstance(arg,tuple):
+                k, v = arg
+                if convert_unicode_keys:
+                    k = str(k)
+                if key_func:
+                    k = key_func(k)
+                if k in illegal_keys:
+                    k = k + '_'
+                values.setdefault(k,[]).append(v)
+            else:
+                positional_args.append(arg)
+
+        kw_args = {}
+        for k, vs in values.items():
+            if len(vs) == 1:
+                v = vs[0]
+            else:
+                v = ImplicitList()
+                for item in vs:
+                    if isinstance(item,list):
+                        v.extend(item)
+                    else:
+                        v.append(item)
+            if isinstance(v,ImplicitList) and convert_implicit_lists:
+                v = ' '.join(v)
+            kw_args[k] = v
 
         return (positional_args, kw_args)
         
@@ -274,30 +275,46 @@ def fragmentize(text,wiki_elements, element_store, environ, remove_escapes=True)
     
     """
 
-    while wiki_elements:
-        # If the first supplied wiki_element is actually a list of elements, \
+    # step through the elements by index; the remaining elements are only
+    # sliced off once, when a match is handed to an element
+    i = 0
+    n = len(wiki_elements)
+    while i < n:
+        # If the current wiki_element is actually a list of elements, \
         # search for all of them and match the closest one only.
-        if isinstance(wiki_elements[0],(list,tuple)):
+        current = wiki_elements[i]
+        if isinstance(current,(list,tuple)):
             x = None
             mos = None
-            for element in wiki_elements[0]:
+            for element in current:
+                if element.required_text is not None and \
+                   element.required_text not in text:
+                    continue
                 mo = element.regexp.search(text)
                 if mo:
                     if x is None or mo.start() < x:
                         x,wiki_element,mos = mo.start(),element,[mo]
         else:
-            wiki_element = wiki_elements[0]
-            mos = [mo for mo in wiki_element.regexp.finditer(text)]
+            wiki_element = current
+            # a missing literal token means the regexp cannot match
+            if wiki_element.required_text is not None and \
+               wiki_element.required_text not in text:
+                i += 1
+                continue
+            mos = list(wiki_element.regexp.finditer(text))
              
         if mos:
+            if i:
+                wiki_elements = wiki_elements[i:]
             frags = wiki_element._process(mos, text, wiki_elements, element_store, environ)
             break
         else:
-            wiki_elements = wiki_elements[1:]
+            i += 1
 
     # remove escape characters 
     else: 
-        if remove_escapes:
+        # skip the regex pass entirely when there is nothing to unescape
+        if remove_escapes and escape_char in text:
             text = esc_to_remove.sub('',text)
         frags = fill_from_store(text,element_store)
         
@@ -305,18 +322,10 @@ def fragmentize(text,wiki_elements, element_store, environ, remove_escapes=True)
 
 
 def fill_from_store(text,element_store):
-    frags = []
-    mos = place_holder_re.finditer(text)
-    start = 0
-    for mo in mos:
-        if mo.start() > start:
-            frags.append(text[start:mo.start()])
-        frags.append(element_store.get(mo.group(1),
-                       mo.group(1).join(['<<<','>>>'])))
-        start = mo.end()
-    if start < len(text):
-        frags.append(text[start:])
-    return frags
+    # split() yields text and stored ids alternately: [text, id, text, ...]
+    get = element_store.get
+    return [p if i % 2 == 0 else get(p, p.join(['<<<','>>>']))
+            for i, p in enumerate(place_holder_re.split(text)) if p or i % 2]
 
 
 class ImplicitList(list):
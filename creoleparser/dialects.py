@@ -8,7 +8,7 @@
 #
 
 import warnings
-import string, keyword
+import keyword
 
 from .elements import *
 from .core import ArgParser
@@ -143,7 +143,7 @@ class ArgDialect(object):
     """Base class for argument string dialect objects."""
     pass
 
-parse_args = ArgParser(dialect=creepy10_base(),key_func=lambda s: s.lower,
+parse_args = ArgParser(dialect=creepy10_base(),key_func=lambda s: s.lower(),
                        illegal_keys=keyword.kwlist + ['macro_name',
                          'arg_string', 'body', 'isblock', 'environ', 'macro'])
 """Function for parsing macro arg_strings using a relaxed xml style"""
@@ -361,7 +361,7 @@ def creole10_base(wiki_links_base_url='',wiki_links_space_char='_',
         else:
             embed_interwiki_space_chars[k] = v
             
-    id_prefix=add_heading_ids is True and '!' or add_heading_ids
+    id_prefix = '!' if add_heading_ids is True else add_heading_ids
     if id_prefix is False:
         fragment_pattern = None
     else:
@@ -371,7 +371,7 @@ def creole10_base(wiki_links_base_url='',wiki_links_space_char='_',
 
         br = LineBreak('br', r'\\',blog_style=blog_style_endings)
         headings = Heading(['h1','h2','h3','h4','h5','h6'],'=', id_prefix=id_prefix)
-        no_wiki = NoWikiElement(no_wiki_monospace and 'code' or 'span',['{{{','}}}'])
+        no_wiki = NoWikiElement('code' if no_wiki_monospace else 'span',['{{{','}}}'])
         simple_element = SimpleElement(token_dict=dict(simple_markup))
         hr = LoneElement('hr','----')
         blank_line = BlankLine()
@@ -420,8 +420,7 @@ def creole10_base(wiki_links_base_url='',wiki_links_space_char='_',
             self.simple_element.child_elements = [self.simple_element]
             self.headings.child_elements = self.inline_elements
             self.p.child_elements = self.inline_elements
-            self.td.child_elements = [self.br, self.raw_link, self.simple_element]
-            self.th.child_elements = [self.br, self.raw_link, self.simple_element]
+            self.td.child_elements = self.th.child_elements = [self.br, self.raw_link, self.simple_element]
             self.tr.child_elements = [self.no_wiki,self.img,self.link,self.custom_elements,self.th,self.td]
             self.table.child_elements = [self.tr]
             self.ol.child_elements = [self.li]
@@ -437,13 +436,13 @@ def creole10_base(wiki_links_base_url='',wiki_links_space_char='_',
 
         @property 
         def block_elements(self):
-            return [self.pre,self.blank_line,self.table,self.headings,
-                               self.hr,self.ul,self.ol,self.p]
             """self.block_elements are the wiki elements that are searched at the top level of text to be
             processed. The order matters because elements later in the list need not have any
             knowledge of those before (as those were parsed out already). This makes the
             regular expression patterns for later elements very simple.
             """        
+            return [self.pre,self.blank_line,self.table,self.headings,
+                               self.hr,self.ul,self.ol,self.p]
 
 
 
@@ -524,10 +523,10 @@ def creole11_base(macro_func=None,
 
         def __init__(self):
             super(Base,self).__init__()
-            self.tr.child_elements[0] = (self.no_wiki,self.bodiedmacro,self.macro)
-            self.dd.child_elements = self.custom_elements + [self.br, self.raw_link, self.simple_element]
-            self.dt.child_elements = self.custom_elements + [self.br, self.raw_link, self.simple_element]
-            self.dl.child_elements = [(self.no_wiki,self.bodiedmacro,self.macro),self.img,self.link,self.dt,self.dd]
+            no_wiki_or_macro = (self.no_wiki,self.bodiedmacro,self.macro)
+            self.tr.child_elements[0] = no_wiki_or_macro
+            self.dd.child_elements = self.dt.child_elements = self.custom_elements + [self.br, self.raw_link, self.simple_element]
+            self.dl.child_elements = [no_wiki_or_macro,self.img,self.link,self.dt,self.dd]
             self.indented.child_elements = self.block_elements
             self.bodiedmacro.dialect = self
             self.bodied_block_macro.dialect = self
@@ -9,7 +9,7 @@
 
 import re
 from six.moves.urllib.parse import urljoin, urlsplit, quote
-from six import string_types
+from six import string_types, get_unbound_function
 import urllib
 import keyword
 import warnings
@@ -35,6 +35,21 @@ MACRO_NAME = r'(?P<name>[a-zA-Z][a-zA-Z0-9]*([-.][a-zA-Z0-9]+)*)'
 Underscore is not included because hyphen is"""
 
 
+def _nesting_regexp(start, end, flags=0):
+    """Returns a regex matching ``start`` or ``end`` tokens of a bodied macro.
+
+    End tokens are matched by the ``end`` group. Macro names come from wiki
+    text, so compiled regexes are left to the bounded cache of ``re``."""
+    return re.compile(start + '|(?P<end>' + end + ')', flags)
+
+
+def _inherits_method(element, cls, name):
+    """Returns True if ``element`` uses ``cls``'s own ``name`` method,
+    i.e. no subclass in between overrides it."""
+    return get_unbound_function(getattr(type(element), name)) is \
+           get_unbound_function(getattr(cls, name))
+
+
 # use Genshi's HTMLSanitizer if possible (i.e., not on Google App Engine)
 try:
     from genshi.filters import HTMLSanitizer
@@ -59,6 +74,15 @@ class WikiElement(object):
     """Determines if newlines are appended to Element(s) during processing.
     Should only affect readability of source xml.
     """
+
+    required_text = None
+    """A string that every match of ``self.regexp`` contains, or None.
+
+    ``fragmentize`` skips the regexp search for text that lacks it. Elements
+    only set it in the constructor when ``re_string`` is not overridden, so
+    subclasses with their own pattern are always searched. Code that
+    reassigns ``token`` and recompiles ``regexp`` must update it as well.
+    """
     
     def __init__(self, tag, token, child_elements=None):
         """Constructor for WikiElement objects.
@@ -126,10 +150,11 @@ class WikiElement(object):
         """
         frags = []
         end = 0
+        remaining_elements = wiki_elements[1:]
         for mo in mos:
             if end != mo.start():
             # call again for leading text and extend the result list 
-                frags.extend(fragmentize(text[end:mo.start()],wiki_elements[1:],
+                frags.extend(fragmentize(text[end:mo.start()],remaining_elements,
                                          element_store, environ))
             # append the found wiki element to the result list
             built = self._build(mo,element_store, environ)
@@ -142,7 +167,7 @@ class WikiElement(object):
         # call again for trailing text and extend the result list
         if end < len(text):
             if not isinstance(wiki_elements[0],(list,tuple)):
-                wiki_elements = wiki_elements[1:]
+                wiki_elements = remaining_elements
             frags.extend(fragmentize(text[end:],wiki_elements,
                                          element_store, environ))
 
@@ -204,7 +229,7 @@ class InlineElement(WikiElement):
             processed = self._build(mo,element_store, environ)
             store_id = str(id(processed)) 
             element_store[store_id] = processed
-            parts.append(''.join([text[end:mo.start()],'<<<',store_id,'>>>']))
+            parts.extend([text[end:mo.start()],'<<<',store_id,'>>>'])
             end = mo.end()
         # call again for trailing text and extend the result list
         if end < len(text):
@@ -303,14 +328,14 @@ class LinkElement(InlineElement):
         self.wikilink_regexp = re.compile(self.wikilink_re_string())
 
     def content_re_string(self):
-        return r'(?P<body>.*?)(' + re.escape(self.delimiter) + '(?P<arg_string>.*?))?$'
+        return r'(?P<body>.*?)(?:' + re.escape(self.delimiter) + '(?P<arg_string>.*?))?$'
 
     def interwikilink_re_string(self):
         all_wikis = set(self.links_funcs.keys())
         all_wikis.update(self.base_urls.keys())
         wiki_id = '(?P<wiki_id>' + '|'.join(all_wikis) + ')'
         optional_spaces = ' *'
-        page_name = r'(?P<page_name>\S+?( \S+?)*)' #allows any number of single spaces
+        page_name = r'(?P<page_name>\S+?(?: \S+?)*)' #allows any number of single spaces
         return '^' + optional_spaces + wiki_id + \
                re.escape(self.interwiki_delimiter) + ' *' + page_name + \
                optional_spaces + '$'
@@ -323,10 +348,10 @@ class LinkElement(InlineElement):
     def wikilink_re_string(self):
         optional_spaces = ' *'
         if self.fragment_pattern:
-            page_name = r'(?P<page_name>\S*?( \S+?)*?)(?P<fragment>' + \
+            page_name = r'(?P<page_name>\S*?(?: \S+?)*?)(?P<fragment>' + \
                         self.fragment_pattern + ')?'
         else:
-            page_name = r'(?P<page_name>\S+?( \S+?)*?)' #allows any number of single spaces
+            page_name = r'(?P<page_name>\S+?(?: \S+?)*?)' #allows any number of single spaces
         return '^' + optional_spaces + page_name + optional_spaces + '$'
 
     def page_name(self,mo):
@@ -341,12 +366,19 @@ class LinkElement(InlineElement):
         body = content_mo.group('body')
         arg_string = content_mo.group('arg_string')
         the_class = None
-        if self.interwikilink_regexp.match(body):
-            interwikilink_mo = self.interwikilink_regexp.match(body)
+        # match each link form at most once, in order of precedence
+        interwikilink_mo = self.interwikilink_regexp.match(body)
+        urllink_mo = wikilink_mo = None
+        if interwikilink_mo is None:
+            urllink_mo = self.urllink_regexp.match(body)
+            if urllink_mo is None:
+                wikilink_mo = self.wikilink_regexp.match(body)
+        if interwikilink_mo:
             link_type = 'interwiki'
-            base_url = self.base_urls.get(interwikilink_mo.group('wiki_id'))
-            link_func = self.links_funcs.get(interwikilink_mo.group('wiki_id'))
-            class_func = self.class_funcs.get(interwikilink_mo.group('wiki_id'))
+            wiki_id = interwikilink_mo.group('wiki_id')
+            base_url = self.base_urls.get(wiki_id)
+            link_func = self.links_funcs.get(wiki_id)
+            class_func = self.class_funcs.get(wiki_id)
             page_name = self.page_name(interwikilink_mo)
             if link_func:
                 url = link_func(page_name)
@@ -356,15 +388,12 @@ class LinkElement(InlineElement):
                 url = urljoin(base_url, url)
             if class_func:
                 the_class = class_func(page_name)
-        elif self.urllink_regexp.match(body):
-            urllink_mo = self.urllink_regexp.match(body)
+        elif urllink_mo:
             link_type = 'external'
-            if sanitizer.is_safe_uri(urllink_mo.group(1)):
-                url = urllink_mo.group(1)
-            else:
+            url = urllink_mo.group(1)
+            if not sanitizer.is_safe_uri(url):
                 url = None
-        elif self.wikilink_regexp.match(body):
-            wikilink_mo = self.wikilink_regexp.match(body)
+        elif wikilink_mo:
             link_type = 'wiki'
             page_name = self.page_name(wikilink_mo)
             if self.path_func and page_name:
@@ -608,9 +637,11 @@ class Macro(WikiElement):
         return value    
 
 
-    trailing_slash = re.compile(r'(?<=[ "\'\]])/$')
     def _build(self,mo,element_store, environ):
-        arg_string = re.sub(self.trailing_slash,'',mo.group(4))
+        arg_string = mo.group(4)
+        # drop a self-closing slash that follows a space, quote or bracket
+        if arg_string.endswith('/') and arg_string[-2:-1] in (' ','"',"'",']'):
+            arg_string = arg_string[:-1]
 
         if mo.group('name') in self.macros:
             value = self._macro_func(mo.group('name'),arg_string,None,False,environ)    
@@ -653,8 +684,8 @@ class BodiedMacro(Macro):
         end = ''.join([esc_neg_look, re.escape(self.token[0]), '/', re.escape(mo.group('name')),
                        re.escape(self.token[1])])
         count = 0
-        for mo2 in re.finditer(start + '|' + end, mo.group('body')):
-            if re.match(end,mo2.group(0)):
+        for mo2 in _nesting_regexp(start, end).finditer(mo.group('body')):
+            if mo2.group('end') is not None:
                 count = count + 1
             else:
                 count = count - 1
@@ -751,8 +782,8 @@ class BodiedBlockMacro(Macro):
         end = ''.join(['^', re.escape(self.token[0]), '/', re.escape(mo.group('name')),
                        re.escape(self.token[1]),r'\s*?$'])
         count = 0
-        for mo2 in re.finditer(start + '|' + end, mo.group('body'),re.MULTILINE):
-            if re.match(end,mo2.group(0)):
+        for mo2 in _nesting_regexp(start, end, re.MULTILINE).finditer(mo.group('body')):
+            if mo2.group('end') is not None:
                 count = count + 1
             else:
                 count = count - 1
@@ -856,10 +887,11 @@ Use of elements.URLLink is depreciated.
         return protocol + rest_of_url + alias
 
     def _build(self,mo,element_store, environ):
-        if not self.href(mo):
+        href = self.href(mo)
+        if not href:
             return None
         return bldr.tag.__getattr__(self.tag)(self.alias(mo,element_store, environ),
-                                              href=self.href(mo))
+                                              href=href)
        
     def href(self,mo):
         """Returns the string for the href attribute of the Element."""
@@ -931,14 +963,15 @@ Use of elements.InterWikiLink is depreciated.
             return href
 
     def _build(self,mo,element_store, environ):
-        if not self.href(mo):
+        href = self.href(mo)
+        if not href:
             return '[[' + mo.group(0) + ']]'
         return bldr.tag.__getattr__(self.tag)(self.alias(mo,element_store, environ),
-                                              href=self.href(mo))
+                                              href=href)
     def alias(self,mo,element_store, environ):
         """Returns the string for the content of the Element."""
         if not mo.group(5):
-            return ''.join([mo.group(1),self.delimiter1,mo.group(2)])
+            return mo.group(1) + self.delimiter1 + mo.group(2)
         else:
             return fragmentize(mo.group(5),self.child_elements,element_store, environ)
 
@@ -1165,27 +1198,26 @@ class Paragraph(BlockElement):
     def _build(self,mo,element_store, environ):
         content = fragmentize(mo.group(1), self.child_elements, element_store, environ)
         # Check each list item and record those that are block only
-        block_only_frags = []
-        for i,element in enumerate(content):
-            if ((isinstance(element, bldr.Element) and
-                element.tag in BLOCK_ONLY_TAGS) or
-                isinstance(element,(Stream,Markup))):
-                block_only_frags.append(i)
+        block_only_frags = [i for i,element in enumerate(content)
+                            if (isinstance(element, bldr.Element) and
+                                element.tag in BLOCK_ONLY_TAGS) or
+                               isinstance(element,(Stream,Markup))]
         # Build a new result list if needed
         if block_only_frags:
             new_content = []
             last_i = -1
             for i in block_only_frags:
-                if content[last_i+1:i]:
-                    if not (len(content[last_i+1:i])==1 and
-                                                content[last_i+1] == '\n'):
-                        new_content.append(bldr.tag.__getattr__(self.tag)(content[last_i+1:i]))
+                inline = content[last_i+1:i]
+                if inline:
+                    if not (len(inline)==1 and inline[0] == '\n'):
+                        new_content.append(bldr.tag.__getattr__(self.tag)(inline))
                     else:
                         new_content.append('\n')
                 new_content.append(content[i])
                 last_i = i
-            if content[last_i+1:]:
-                new_content.append(bldr.tag.__getattr__(self.tag)(content[last_i+1:]))
+            inline = content[last_i+1:]
+            if inline:
+                new_content.append(bldr.tag.__getattr__(self.tag)(inline))
             return bldr.tag(new_content)
         else:
             return bldr.tag.__getattr__(self.tag)(content)
@@ -1220,6 +1252,8 @@ class Heading(BlockElement):
     def __init__(self, tag, token, id_prefix):
         super(Heading,self).__init__('',token)
         self.id_prefix = id_prefix
+        if _inherits_method(self, Heading, 're_string'):
+            self.required_text = token
         self.tags = tag
         self.regexp = re.compile(self.re_string(),re.MULTILINE)
 
@@ -1291,6 +1325,8 @@ class Table(BlockElement):
 
     def __init__(self, tag, token):
         super(Table,self).__init__(tag,token)
+        if _inherits_method(self, Table, 're_string'):
+            self.required_text = token
         self.regexp = re.compile(self.re_string(),re.MULTILINE)
 
     def re_string(self):
@@ -1423,8 +1459,18 @@ class PreBlock(BlockElement):
     
     """
 
+    _close_token = None
+
     def __init__(self, tag, token ):
         super(PreBlock,self).__init__(tag,token )
+        if isinstance(token,str):
+            open_token = close_token = token
+        else:
+            open_token, close_token = token[0], token[1]
+        if _inherits_method(self, PreBlock, 're_string'):
+            self.required_text = open_token
+        if _inherits_method(self, PreBlock, 're_string2'):
+            self._close_token = close_token
         self.regexp = re.compile(self.re_string(),re.DOTALL+re.MULTILINE)
         self.regexp2 = re.compile(self.re_string2(),re.MULTILINE)
 
@@ -1446,7 +1492,10 @@ class PreBlock(BlockElement):
             return r'^ (\s*?' + re.escape(self.token[1]) + r'\s*?\n)'
 
     def _build(self,mo,element_store, environ):
-        match = self.regexp2.sub(r'\1',mo.group(1))
+        match = mo.group(1)
+        # closing tokens inside the body are rare; skip the sub without one
+        if self._close_token is None or self._close_token in match:
+            match = self.regexp2.sub(r'\1',match)
         
         return bldr.tag.__getattr__(self.tag)(
             fragmentize(match,self.child_elements,
@@ -1485,6 +1534,8 @@ class LoneElement(BlockElement):
 
     def __init__(self, tag, token):
         super(LoneElement,self).__init__(tag,token )
+        if _inherits_method(self, LoneElement, 're_string'):
+            self.required_text = token
         self.regexp = re.compile(self.re_string(),re.DOTALL+re.MULTILINE)
 
     def re_string(self):
@@ -1517,16 +1568,17 @@ class BlankLine(WikiElement):
         
         frags = []
         end = 0
+        remaining_elements = wiki_elements[1:]
         for mo in mos:
             if end != mo.start():
             # call again for leading text and extend the result list 
-                frags.extend(fragmentize(text[end:mo.start()],wiki_elements[1:],
+                frags.extend(fragmentize(text[end:mo.start()],remaining_elements,
                                          element_store, environ))
             end = mo.end()
         # call again for trailing text and extend the result list
         if end < len(text):
             if not isinstance(wiki_elements[0],(list,tuple)):
-                wiki_elements = wiki_elements[1:]
+                wiki_elements = remaining_elements
             frags.extend(fragmentize(text[end:],wiki_elements,
                  element_store, environ))
 
@@ -1567,7 +1619,7 @@ class KeywordArg(ArgString):
 
    def re_string(self):
       return r'(?P<key>\w[\w0-9]*) *'+re.escape(self.token) + \
-               r' *(?P<body>.*?) *(?=\w[\w0-9]* *' + re.escape(self.token) +'|$)'
+               r' *(?P<body>.*?) *(?=\b\w[\w0-9]* *' + re.escape(self.token) +'|$)'
 
    def _build(self,mo,element_store, environ):
       if mo.group('body') == '':
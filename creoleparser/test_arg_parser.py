@@ -4,9 +4,6 @@ from .__init__ import parse_args
 from .core import ArgParser
 from .dialects import creepy10_base, creepy20_base
 
-def lower(s):
-    return s.lower()
-
 class BaseTest(object):
     """
 
@@ -14,33 +11,33 @@ class BaseTest(object):
     parse = parse_args
 
     def test_pos_args(self):
-        self.assertEquals(
+        self.assertEqual(
             self.parse("one two"),
             (['one', 'two'],{}))
-        self.assertEquals(
+        self.assertEqual(
          self.parse(""),
             ([],{}))
     def test_kw_args(self):
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" one = oneval "),
             ([],{'one': 'oneval'}))
-        self.assertEquals(
+        self.assertEqual(
             self.parse("one = oneval two=twoval"),
             ([],{'one': 'oneval','two': 'twoval'}))
-        self.assertEquals(
+        self.assertEqual(
             self.parse("""one = 'oneval' two = "twoval" """),
             ([],{'one': 'oneval','two': 'twoval'}))
 
     def test_mixed_args(self):
-        self.assertEquals(
+        self.assertEqual(
             self.parse("one one = oneval "),
             (['one'],{'one': 'oneval'}))
 
     def test_quoting(self):
-        self.assertEquals(
+        self.assertEqual(
             self.parse("""one 'two' "three" """),
             (['one', 'two', "three"],{}))
-        self.assertEquals(
+        self.assertEqual(
             self.parse(""" "height = 54in" one = "don't try it" """),
             (['height = 54in'],{'one': "don't try it"}))
 
@@ -58,36 +55,36 @@ class ListTest(unittest.TestCase, BaseTest):
         
     def test_pos_args(self):
         super(ListTest, self).test_pos_args()
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" one [ two ] "),
             (['one',['two']],{}))
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" one [two three ] "),
             (['one', ['two', 'three']],{}))
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" [one two] "),
             ([['one','two']],{}))
 
     def test_kw_args(self):
         super(ListTest, self).test_kw_args()
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" one  = [ oneval ] two = twoval "),
             ([],{'one':['oneval'],'two':'twoval'}))
 
     def test_mixed_args(self):
         super(ListTest, self).test_mixed_args()
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" [one] one  = [ oneval ] "),
             ([['one']],{'one':['oneval']}))
 
     def test_implicit_list(self):
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" one  = oneval foo two = twoval"),
             ([],{'one':['oneval','foo'],'two':'twoval'}))
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" one  = oneval foo one = twoval"),
             ([],{'one':['oneval','foo', 'twoval']}))
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" one  = 'oneval' foo "),
             ([],{'one':['oneval','foo']}))  
 
@@ -99,25 +96,25 @@ class ForceStringsTest(unittest.TestCase, BaseTest):
         
     def test_pos_args(self):
         super(ForceStringsTest, self).test_pos_args()
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" one [ two ] "),
             (['one',['two']],{}))
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" one [two three ] "),
             (['one', ['two', 'three']],{}))
 
     def test_kw_args(self):
         super(ForceStringsTest, self).test_kw_args()
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" one  = [ oneval ] "),
             ([],{'one': ['oneval']}))
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" one  = oneval one = twoval "),
             ([],{'one':'oneval twoval'}))
 
     def test_mixed_args(self):
         super(ForceStringsTest, self).test_mixed_args()
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" [one] one  = 'oneval' foo "),
             ([['one']],{'one':'oneval foo'}))
         
@@ -126,17 +123,17 @@ class KeyFuncTest(unittest.TestCase, BaseTest):
     """
     """
     def setUp(self):
-        self.parse = ArgParser(creepy10_base(),key_func=lower,convert_implicit_lists=False)
+        self.parse = ArgParser(creepy10_base(),key_func=str.lower,convert_implicit_lists=False)
         
     def test_kw_args(self):
         super(KeyFuncTest, self).test_kw_args()
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" ONE  = oneval  Two = twoval "),
             ([],{'one':'oneval','two':'twoval'}))
 
     def test_mixed_args(self):
         super(KeyFuncTest, self).test_mixed_args()
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" one One  =  oneval  "),
             (['one'],{'one':'oneval'}))
 
@@ -148,17 +145,27 @@ class IllegalKeysTest(unittest.TestCase, BaseTest):
         
     def test_kw_args(self):
         super(IllegalKeysTest, self).test_kw_args()
-        self.assertEquals(
+        self.assertEqual(
             self.parse(" onety  =  oneval  twoty = twoval "),
             ([],{'onety_':'oneval','twoty_':'twoval'}))
 
 
+class ParseArgsTest(unittest.TestCase):
+    """
+    """
+    def test_kw_args(self):
+        self.assertEqual(
+            parse_args(" One = oneval  class = twoval "),
+            ([],{'one':'oneval','class_':'twoval'}))
+
+
 def test_suite():
     return unittest.TestSuite((
         unittest.makeSuite(ListTest),
         unittest.makeSuite(ForceStringsTest),
         unittest.makeSuite(KeyFuncTest),
         unittest.makeSuite(IllegalKeysTest),
+        unittest.makeSuite(ParseArgsTest),
         ))
 
 
@@ -168,9 +175,4 @@ def run_suite(verbosity=1):
 
 
 if __name__ == "__main__":
-    import sys
-    args = sys.argv
-    verbosity = 1
-    if len(args) > 1:
-        verbosity = args[1]
-    run_suite(verbosity=verbosity)
+    unittest.main(defaultTest='test_suite')
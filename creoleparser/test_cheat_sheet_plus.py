@@ -7,27 +7,27 @@ import genshi.builder as bldr
 from . import dialects, core
 import os
 
+page_cache = {}
+"""Raw page bodies keyed by file path (None for missing pages)"""
+
 class Page(object):
     root = 'test_pages'
     def __init__(self,page_name):
         self.name = page_name
 
     def get_raw_body(self):
-        try:
-            f = open(os.path.join(self.root,self.name + '.txt'),'r')
-            s = f.read()
-            f.close()
-            return s
-        except IOError:
-            return None
+        path = os.path.join(self.root,self.name + '.txt')
+        if path not in page_cache:
+            try:
+                f = open(path,'r')
+                page_cache[path] = f.read()
+                f.close()
+            except IOError:
+                page_cache[path] = None
+        return page_cache[path]
 
     def exists(self):
-        try:
-            f = open(os.path.join(self.root,self.name + '.txt'),'r')
-            f.close()
-            return True
-        except IOError:
-            return False
+        return self.get_raw_body() is not None
         
 
 def class_func(page_name):
@@ -70,8 +70,9 @@ macros = {'include':include,
           }
 
 def macro_dispatcher(macro_name,arg_string,body,isblock,environ):
-    if macro_name in macros:
-        return macros[macro_name](arg_string,body,isblock)
+    macro = macros.get(macro_name)
+    if macro is not None:
+        return macro(arg_string,body,isblock)
     
 dialect = dialects.create_dialect(dialects.creole11_base,
     wiki_links_base_url='',
@@ -85,21 +86,23 @@ dialect = dialects.create_dialect(dialects.creole11_base,
 text2html = core.Parser(dialect)
 
 
+def read_test_page(file_name):
+    f = open(os.path.join(Page.root,file_name),'r')
+    try:
+        return f.read()
+    finally:
+        f.close()
+
+
 if __name__ == '__main__':
     
     text = Page('CheatSheetPlus').get_raw_body()
-    f = open(os.path.join('test_pages','CheatSheetPlus.html'),'r')
-    rendered = f.read()
-    f.close()
-    f = open(os.path.join('test_pages','template.html'),'r')
-    template = f.read()
-    f.close()
-
-    out = open(os.path.join('test_pages','out.html'),'w')
-    out.write(template % text2html(text))
-    out.close()
-    
-    assert template % text2html(text) == rendered
+    rendered = read_test_page('CheatSheetPlus.html')
+    template = read_test_page('template.html')
+    result = template % text2html(text)
 
+    out = open(os.path.join(Page.root,'out.html'),'w')
+    out.write(result)
+    out.close()
     
-
+    assert result == rendered